@@ -0,0 +1,137 @@
+"""Benchmark all PartN solvers on their inputs.
+
+    python bench.py [--days day01 day19] [--repeat 10] [--warmup 2]
+                    [--output bench.json] [--baseline old.json] [--no-memory]
+
+Results are written as JSON, keyed by "dayNN.PartN". Passing a previous
+result file as --baseline prints the change of the median time per puzzle.
+With AOC_PARSE_CACHE set, puzzles that implement parse() load their parsed
+input from the cache instead of parsing it again (see parse_cache.py).
+"""
+import argparse
+import importlib
+import json
+import os
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+from puzzle import Puzzle
+
+
+# Constructor arguments of parametrized puzzles, as used in their main(), keyed by
+# class and then by benchmark name.
+PUZZLE_ARGS = {
+    "day06.Part1": {"Part1": (80,), "Part2": (256, 2)},
+    "day14.Day14": {"Part1": (1, 10), "Part2": (2, 40)},
+    "day21.Part1": {"Part1": ([9, 10],)},
+    "day21.Part2": {"Part2": ([9, 10],)},
+    "day23.Part1": {"Part1": ([("B", "D"), ("C", "A"), ("B", "C"), ("A", "D")],)},
+    "day23.Part2": {"Part2": ([("B", "D", "D", "D"), ("C", "B", "C", "A"), ("B", "A", "B", "C"), ("A", "C", "A", "D")],)},
+}
+
+# puzzles that get their whole input through the constructor
+NO_INPUT_FILE = {"day21", "day23"}
+
+
+def discover(days=None):
+    """Yield (day, name, factory) for every benchmarkable puzzle."""
+    for path in sorted(Path(__file__).parent.glob("day[0-9][0-9].py")):
+        if days and path.stem not in days:
+            continue
+        module = importlib.import_module(path.stem)
+        for name, cls in sorted(vars(module).items()):
+            # listed puzzles need not be named PartN, e.g. day14.Day14
+            if f"{path.stem}.{name}" in PUZZLE_ARGS:
+                for label, args in PUZZLE_ARGS[f"{path.stem}.{name}"].items():
+                    yield path.stem, label, partial(cls, *args)
+                continue
+            if not (name.startswith("Part") and isinstance(cls, type) and issubclass(cls, Puzzle)):
+                continue
+            try:
+                cls()
+            except TypeError:
+                print(f"{path.stem}.{name}: constructor arguments unknown, skipped (see PUZZLE_ARGS)")
+                continue
+            yield path.stem, name, cls
+
+
+def measure(factory, filename, repeat, warmup, memory=True):
+    # a fresh instance for every run, some puzzles keep counters in attributes
+    for _ in range(warmup):
+        factory().solve_file(filename)
+
+    times = []
+    for _ in range(repeat):
+        puzzle = factory()
+        start = time.perf_counter()
+        result = puzzle.solve_file(filename)
+        times.append(time.perf_counter() - start)
+    times.sort()
+
+    peak = None
+    if memory:
+        # separate run, because tracing allocations distorts the timings
+        tracemalloc.start()
+        factory().solve_file(filename)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "result": str(result),
+        "min": times[0],
+        "median": percentile(times, 0.5),
+        "p95": percentile(times, 0.95),
+        "peak_memory": peak,
+        "repeat": repeat,
+    }
+
+
+def percentile(sorted_values, q):
+    return sorted_values[round(q * (len(sorted_values) - 1))]
+
+
+def compare(results, baseline):
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = new["median"] / old["median"]
+        changed = "" if new["result"] == old["result"] else "  RESULT CHANGED"
+        print(f"{key:<14} {old['median']:10.6f}s -> {new['median']:10.6f}s  x{ratio:.2f}{changed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark all puzzle solvers")
+    parser.add_argument("--days", nargs="*", help="module names, e.g. day01 day19")
+    parser.add_argument("--inputs", default="inputs")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) tracemalloc run")
+    args = parser.parse_args()
+
+    results = {}
+    for day, name, factory in discover(args.days):
+        filename = None if day in NO_INPUT_FILE else os.path.join(args.inputs, f"{day}.txt")
+        if filename is not None and not os.path.exists(filename):
+            print(f"{day}.{name}: no input file {filename}, skipped")
+            continue
+        r = measure(factory, filename, args.repeat, args.warmup, memory=not args.no_memory)
+        results[f"{day}.{name}"] = r
+        peak = "" if r["peak_memory"] is None else f"  peak {r['peak_memory'] / 2**20:.1f} MiB"
+        print(f"{day}.{name:<6} min {r['min']:.6f}s  median {r['median']:.6f}s  "
+              f"p95 {r['p95']:.6f}s{peak} -- {r['result']}")
+
+    with open(args.output, "wt") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "rt") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Bulk input parsing for puzzles with `input_mode = "buffer"`.
+
+Instead of one str per line, such puzzles get the whole input as a bytes-like
+buffer (memory-mapped when read from a file), which the helpers below turn
+into NumPy arrays without going through Python objects per number.
+"""
+import mmap
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+
+@contextmanager
+def map_file(filename):
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""  # empty files can't be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+def parse_ints(buf):
+    """All integers in `buf`, separated by any non-digit (commas, whitespace, ...)."""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    positions = np.flatnonzero((data >= ord("0")) & (data <= ord("9")))
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # index into `positions` where each number starts and ends
+    starts = np.flatnonzero(np.diff(positions, prepend=-2) != 1)
+    ends = np.append(starts[1:], len(positions))
+
+    exponents = np.repeat(ends, ends - starts) - np.arange(len(positions)) - 1
+    digits = (data[positions] - ord("0")).astype(np.int64)
+    numbers = np.add.reduceat(digits * POWERS_OF_TEN[exponents], starts)
+
+    first = positions[starts]
+    numbers[(first > 0) & (data[first - 1] == ord("-"))] *= -1
+    return numbers
+
+
+def parse_digit_grid(buf, dtype=int):
+    """A rectangular block of single-digit lines as 2d array."""
+    return (digit_grid_view(buf) - ord("0")).astype(dtype)
+
+
+def digit_grid_view(buf):
+    """2d view of the ASCII codes in a rectangular block of lines, without copying.
+
+    The view keeps `buf` exported, so delete it before closing a memory map.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    width = buf.find(b"\n")
+    if width < 0:
+        width = len(data)
+    rows = (len(data) + 1) // (width + 1)
+    return np.lib.stride_tricks.as_strided(data, (rows, width), (width + 1, 1), writeable=False)
+
+
+def iter_int_chunks(f, block_size=2**24):
+    """parse_ints over a binary stream, one block at a time.
+
+    A number that is cut off at the end of a block is carried over to the next.
+    """
+    rest = b""
+    while block := f.read(block_size):
+        block = rest + block
+        head = block.rstrip(b"-0123456789")
+        rest = block[len(head):]
+        yield parse_ints(head)
+    yield parse_ints(rest)
+
+
+def line_ranges(buf, n):
+    """Split `buf` into at most n (start, end) byte ranges that end at line boundaries."""
+    bounds = [0]
+    for i in range(1, n):
+        pos = buf.find(b"\n", max(bounds[-1], len(buf) * i // n))
+        if pos < 0:
+            break
+        bounds.append(pos + 1)
+    bounds.append(len(buf))
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
@@ -1,39 +1,76 @@
-from itertools import islice
+import io
 
+import numpy as np
+
+from bulk import iter_int_chunks, parse_ints
 from puzzle import Puzzle
 
 
 class Part1(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 1, Part 1")
 
     def solve(self, input):
-        numbers = (int(x) for x in input)
-        pairs = window(numbers, 2)
-        is_increment = (1 for a, b in pairs if b > a)
-        return sum(is_increment)
+        return count_increases(parse_ints(input), 1)
 
 
 class Part2(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 1, Part 2")
 
     def solve(self, input):
-        numbers = (int(x) for x in input)
-        smoothed = (sum(x) for x in window(numbers, 3))
-        pairs = window(smoothed, 2)
-        is_increment = (1 for a, b in pairs if b > a)
-        return sum(is_increment)
+        return count_increases(parse_ints(input), 3)
+
+
+def count_increases(numbers, n=1):
+    # the sums of two consecutive windows of size n share n-1 numbers, so the
+    # sum increases exactly when the number entering the window is larger
+    # than the one leaving it.
+    numbers = np.asarray(numbers)
+    return int(np.count_nonzero(numbers[n:] > numbers[:-n]))
+
 
+def count_increases_chunked(chunks, n=1):
+    # for inputs that don't fit into memory, e.g. chunks=bulk.iter_int_chunks(f)
+    monitor = DepthMonitor((n,))
+    for chunk in chunks:
+        monitor.feed(chunk)
+    return monitor.counts[0]
 
-def window(seq, n=2):
-    it = iter(seq)
-    result = tuple(islice(it, n))
-    if len(result) == n:
-        yield result
-    for item in it:
-        result = result[1:] + (item,)
-        yield result
+
+class DepthMonitor:
+    """Window increase counts over readings that arrive over time.
+
+    Only the last max(windows) readings are kept between chunks, so memory
+    does not grow with the number of readings. With the default windows,
+    `counts` holds the answers to part 1 and part 2.
+    """
+
+    def __init__(self, windows=(1, 3)):
+        self.windows = windows
+        self.counts = [0] * len(windows)
+        self.tail = np.zeros(0, dtype=np.int64)
+
+    def feed(self, readings):
+        numbers = np.concatenate([self.tail, np.asarray(readings, dtype=np.int64)])
+        # readings in the tail have already been compared with their predecessors
+        start = len(self.tail)
+        for i, n in enumerate(self.windows):
+            first = max(start, n)
+            if first < len(numbers):
+                self.counts[i] += int(np.count_nonzero(numbers[first:] > numbers[first - n : len(numbers) - n]))
+        self.tail = numbers[-max(self.windows):]
+        return self.counts
+
+    def feed_stream(self, f, block_size=2**16):
+        # f is a binary file, or e.g. socket.makefile("rb")
+        for chunk in iter_int_chunks(f, block_size):
+            self.feed(chunk)
+        return self.counts
 
 
 def main():
@@ -43,6 +80,15 @@ def main():
     Part2().check(EXAMPLE_INPUT, 5)
     Part2().run("inputs/day01.txt")
 
+    # small blocks split numbers between chunks
+    for block_size in (1, 4, 2**16):
+        counts = DepthMonitor().feed_stream(io.BytesIO(EXAMPLE_INPUT.encode()), block_size)
+        assert counts == [7, 5], counts
+    monitor = DepthMonitor()
+    for reading in map(int, EXAMPLE_INPUT.split()):
+        monitor.feed([reading])
+    assert monitor.counts == [7, 5], monitor.counts
+
 
 if __name__ == '__main__':
     EXAMPLE_INPUT = """199
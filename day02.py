@@ -1,47 +1,92 @@
-from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+import os
 
+import numpy as np
+
+from bulk import line_ranges, map_file, parse_ints
 from puzzle import Puzzle
 
+FORWARD, DOWN, UP = b"fdu"
+
 
 class Part1(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 1, Part 1")
 
     def solve(self, input):
-        commands = (x.split() for x in input)
-        hpos, depth = 0, 0
-        for dir, dist in commands:
-            match dir, int(dist):
-                case ('forward', n): hpos += n
-                case ('down', n): depth += n
-                case ('up', n): depth -= n
-                case other: raise ValueError(other)
-        return hpos * depth
+        dirs, dists = encode_commands(input)
+        hpos = dists[dirs == FORWARD].sum()
+        depth = dists[dirs == DOWN].sum() - dists[dirs == UP].sum()
+        return int(hpos) * int(depth)
 
 
 class Part2(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 1, Part 2")
 
     def solve(self, input):
-        commands = (x.split() for x in input)
-        hpos, depth, aim = 0, 0, 0
-        for dir, dist in commands:
-            match dir, int(dist):
-                case ('forward', n):
-                    hpos += n
-                    depth += n * aim
-                case ('down', n): aim += n
-                case ('up', n): aim -= n
-                case other: raise ValueError(other)
+        hpos, depth, _ = navigate(*encode_commands(input))
         return hpos * depth
 
+    def solve_parallel(self, filename, workers=None, n_segments=None):
+        with map_file(filename) as buf:
+            ranges = line_ranges(buf, n_segments or 4 * (workers or os.cpu_count()))
+        with ProcessPoolExecutor(workers) as pool:
+            states = pool.map(partial(navigate_segment, filename), ranges)
+            hpos, depth, _ = reduce(combine, states, (0, 0, 0))
+        return hpos * depth
+
+
+def navigate(dirs, dists):
+    """(hpos, depth, aim) after following the commands, starting with all zeros."""
+    forward = np.where(dirs == FORWARD, dists, 0)
+    # the aim at each command is the prefix sum of all downs and ups before it
+    aim = np.cumsum(np.where(dirs == DOWN, dists, 0) - np.where(dirs == UP, dists, 0))
+    final_aim = int(aim[-1]) if len(aim) else 0
+    return int(forward.sum()), int((forward * aim).sum()), final_aim
+
+
+def navigate_segment(filename, byte_range):
+    start, end = byte_range
+    with map_file(filename) as buf:
+        segment = buf[start:end]
+    return navigate(*encode_commands(segment))
+
+
+def combine(first, second):
+    # the second segment started with aim 0, but actually starts with the first one's final aim
+    h1, d1, a1 = first
+    h2, d2, a2 = second
+    return h1 + h2, d1 + d2 + a1 * h2, a1 + a2
+
+
+def encode_commands(buf):
+    """Direction (first letter of the command) and distance of every line."""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    line_starts = np.flatnonzero(data[:-1] == ord("\n")) + 1
+    if len(data):
+        line_starts = np.concatenate([[0], line_starts])
+    dirs = data[line_starts]
+
+    unknown = ~np.isin(dirs, (FORWARD, DOWN, UP))
+    if unknown.any():
+        raise ValueError(f"unknown command in line {np.argmax(unknown) + 1}")
+
+    return dirs, parse_ints(buf)
+
 
 def main():
     Part1().check(EXAMPLE_INPUT, 150)
     Part1().run("inputs/day02.txt")
 
     Part2().check(EXAMPLE_INPUT, 900)
+    Part2().check_file(EXAMPLE_INPUT, 900, "solve_parallel", workers=2, n_segments=3)
+    Part2().check_file(EXAMPLE_INPUT, 900, "solve_parallel", workers=1, n_segments=6)
     Part2().run("inputs/day02.txt")
 
 
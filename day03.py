@@ -1,67 +1,76 @@
+from bisect import bisect_left
 
+import numpy as np
+
+from bulk import parse_digit_grid
 from puzzle import Puzzle
 
 
 class Part1(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 3, Part 1")
 
     def solve(self, input):
-        numbers = list(input)
-
-        most_commons = []
-        for i in range(0, 99):
-            try:
-                most_commons.append(most_common_bit(x[i] for x in numbers))
-            except IndexError:
-                break
+        bits = parse_digit_grid(input, dtype=np.uint8)
+        one_counts = bits.sum(axis=0, dtype=np.int64)
+        most_commons = 2 * one_counts >= len(bits)
 
-        gamma_rate = int(''.join(most_commons), 2)
-        epsilon_rate = int(''.join(map(strinv, most_commons)), 2)
+        gamma_rate = bits_to_int(most_commons)
+        epsilon_rate = bits_to_int(~most_commons)
         return gamma_rate * epsilon_rate
 
 
 class Part2(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self):
         super().__init__("Day 3, Part 2")
 
     def solve(self, input):
-        numbers = list(input)
-        oxy = self.compute(numbers, self.oxy_criterion)
-        co2 = self.compute(numbers, self.co2_criterion)
+        bits = parse_digit_grid(input, dtype=np.uint8)
+        numbers = sorted_numbers(bits)
+        width = bits.shape[1]
+        oxy = self.compute(numbers, width, self.oxy_criterion)
+        co2 = self.compute(numbers, width, self.co2_criterion)
         return oxy * co2
 
-    def oxy_criterion(self, bits):
-        return most_common_bit(bits)
-
-    def co2_criterion(self, bits):
-        return strinv(most_common_bit(bits))
-
-    def compute(self, numbers, compute_criterion):
-        current_bit = 0
-        while len(numbers) > 1:
-            keep_bit = compute_criterion(x[current_bit] for x in numbers)
-            numbers = list(filter(lambda x: x[current_bit] == keep_bit, numbers))
-            current_bit += 1
-        return int(numbers[0], 2)
-
-
-def most_common_bit(bits):
-    one_count = 0
-    zero_count = 0
-    for x in bits:
-        if x == '1':
-            one_count += 1
-        else:
-            zero_count += 1
-    return '1' if one_count >= zero_count else '0'
-
-
-def strinv(bit):
-    match bit:
-        case '1': return '0'
-        case '0': return '1'
-        case _: raise ValueError(f"invalid bit: {bit}")
+    def oxy_criterion(self, zero_count, one_count):
+        return one_count >= zero_count
+
+    def co2_criterion(self, zero_count, one_count):
+        return one_count < zero_count
+
+    def compute(self, numbers, width, keep_ones_criterion):
+        # The candidates are always a range of the sorted numbers that share all bits
+        # above the current one. Those with the current bit set come after those with
+        # the bit cleared, so a binary search splits the range in two.
+        lo, hi = 0, len(numbers)
+        for bit in reversed(range(width)):
+            if hi - lo <= 1:
+                break
+            prefix = int(numbers[lo]) >> (bit + 1) << (bit + 1)
+            split = bisect_left(numbers, prefix | (1 << bit), lo, hi)
+            if split in (lo, hi):
+                continue  # all candidates have the same bit
+            if keep_ones_criterion(split - lo, hi - split):
+                lo = split
+            else:
+                hi = split
+        return int(numbers[lo])
+
+
+def sorted_numbers(bits):
+    if bits.shape[1] < 64:
+        weights = 1 << np.arange(bits.shape[1], dtype=np.int64)[::-1]
+        return np.sort(bits.astype(np.int64) @ weights)
+    return sorted(map(bits_to_int, bits))
+
+
+def bits_to_int(bits):
+    packed = np.packbits(bits)  # pads the last byte with zeros
+    return int.from_bytes(packed.tobytes(), "big") >> (-len(bits) % 8)
 
 
 def main():
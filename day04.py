@@ -1,97 +1,144 @@
-from math import isnan
+import numpy as np
 
+from bulk import parse_ints
 from puzzle import Puzzle
 
 
 class Day04(Puzzle):
-    def __init__(self, part):
+    input_mode = "buffer"
+
+    def __init__(self, part, closed_form=False):
         super().__init__(f"Day 4, Part {part}")
+        self.closed_form = closed_form
 
     def load_boards(self, input):
-        numbers = list(map(int, next(input).split(',')))
-        next(input)  # skip blank line
-        boards = []
-        current_board = []
-        for line in input:
-            if not line:
-                boards.append(Board(current_board))
-                current_board = []
-            else:
-                current_board.append(list(map(int, line.split())))
-        boards.append(Board(current_board))
+        first_line_end = input.find(b"\n")
+        numbers = parse_ints(input[:first_line_end]).tolist()
+        boards = parse_ints(input[first_line_end:]).reshape(-1, 5, 5)
         return numbers, boards
 
 
 class Part1(Day04):
-    def __init__(self):
-        super().__init__(1)
+    def __init__(self, closed_form=False):
+        super().__init__(1, closed_form)
 
     def solve(self, input):
         numbers, boards = self.load_boards(input)
 
-        for n in numbers:
-            for board in boards:
-                board.mark(n)
-                if board.wins():
-                    return board.score(n)
+        if self.closed_form:
+            turns, scores = win_turns(numbers, boards)
+            if turns.min() == len(numbers):
+                return None
+            return int(scores[np.argmin(turns)])
+
+        for board, score in BingoHall(boards).play(numbers):
+            return score
 
 
 class Part2(Day04):
-    def __init__(self):
-        super().__init__(2)
+    def __init__(self, closed_form=False):
+        super().__init__(2, closed_form)
 
     def solve(self, input):
         numbers, boards = self.load_boards(input)
 
-        for n in numbers:
-            active_boards = []
-            for board in boards:
-                board.mark(n)
-                if board.wins():
-                    if len(boards) == 1:
-                        return board.score(n)
-                else:
-                    active_boards.append(board)
-            boards = active_boards
-
-
-class Board:
-    def __init__(self, board):
-        self.board = board
-        self.marks = [[float('nan') for _ in range(5)] for _ in range(5)]
+        if self.closed_form:
+            turns, scores = win_turns(numbers, boards)
+            winners = np.flatnonzero(turns < len(numbers))
+            if len(winners) == 0:
+                return None
+            # of the boards winning on the same last turn, the simulation reports the last one
+            last = winners[turns[winners] == turns[winners].max()][-1]
+            return int(scores[last])
+
+        score = None
+        for board, score in BingoHall(boards).play(numbers):
+            pass
+        return score
+
+
+class BingoHall:
+    """All boards in one array, marked through a reverse index of their numbers.
+
+    Instead of searching every board for a drawn number, the cells holding that
+    number are looked up in the index, and per-row and per-column hit counters
+    tell whether the mark completed a line.
+    """
+
+    def __init__(self, boards):
+        self.boards = boards
+        self.size = boards.shape[1]
+        cells = boards.reshape(-1)
+        self.cell_order = np.argsort(cells, kind="stable")
+        self.sorted_cells = cells[self.cell_order]
+
+        self.row_hits = np.zeros(boards.shape[:2], dtype=int)
+        self.col_hits = np.zeros(boards.shape[:2], dtype=int)
+        self.unmarked_sum = boards.sum(axis=(1, 2))
+        self.won = np.zeros(len(boards), dtype=bool)
+        self.drawn = set()
 
     def mark(self, n):
-        for i in range(5):
-            for j in range(5):
-                if self.board[i][j] == n:
-                    self.marks[i][j] = n
-
-    def wins(self):
-        for i in range(5):
-            row_sum = sum(self.marks[i])
-            if not isnan(row_sum):
-                return True
-            col_sum = sum(self.marks[j][i] for j in range(5))
-            if not isnan(col_sum):
-                return True
-        return False
-
-    def score(self, n):
-        total_unmarked = 0
-        for i in range(5):
-            for j in range(5):
-                if isnan(self.marks[i][j]):
-                    total_unmarked += self.board[i][j]
-        return total_unmarked * n
+        """Mark n on all boards, return the boards that win with it."""
+        if n in self.drawn:
+            return np.zeros(0, dtype=int)  # already marked, must not count twice
+        self.drawn.add(n)
+        lo, hi = np.searchsorted(self.sorted_cells, [n, n + 1])
+        board, cell = np.divmod(self.cell_order[lo:hi], self.size * self.size)
+        row, col = np.divmod(cell, self.size)
+
+        np.add.at(self.row_hits, (board, row), 1)
+        np.add.at(self.col_hits, (board, col), 1)
+        np.subtract.at(self.unmarked_sum, board, n)
+
+        complete = (self.row_hits[board, row] == self.size) | (self.col_hits[board, col] == self.size)
+        winners = np.unique(board[complete & ~self.won[board]])
+        self.won[winners] = True
+        return winners
+
+    def play(self, numbers):
+        """Yield (board, score) of every board, in the order they win."""
+        for n in numbers:
+            for board in self.mark(n):
+                yield int(board), int(self.unmarked_sum[board]) * n
+
+
+def win_turns(numbers, boards):
+    """The turn on which each board wins, and its score, computed without drawing.
+
+    A line is complete on the turn its last number is drawn, and a board wins
+    with its first complete line. Boards that never win get turn len(numbers).
+    """
+    never = len(numbers)
+    numbers = np.asarray(numbers)
+    rank = np.full(max(boards.max(), numbers.max(initial=0)) + 1, never)
+    rank[numbers[::-1]] = np.arange(never)[::-1]  # first draw counts for repeated numbers
+
+    times = rank[boards]
+    row_turns = times.max(axis=2).min(axis=1)
+    col_turns = times.max(axis=1).min(axis=1)
+    turns = np.minimum(row_turns, col_turns)
+
+    unmarked_sum = np.where(times > turns[:, None, None], boards, 0).sum(axis=(1, 2))
+    last_number = np.append(numbers, 0)[turns]
+    return turns, unmarked_sum * last_number
 
 
 def main():
     Part1().check(EXAMPLE_INPUT, 4512)
+    Part1(closed_form=True).check(EXAMPLE_INPUT, 4512)
     Part1().run("inputs/day04.txt")
 
     Part2().check(EXAMPLE_INPUT, 1924)
+    Part2(closed_form=True).check(EXAMPLE_INPUT, 1924)
     Part2().run("inputs/day04.txt")
 
+    # repeated draws mark nothing new; row 1 wins with 9
+    repeated = "0,0,0,0,0,5,6,7,8,9\n\n" + "\n".join(" ".join(map(str, range(r, r + 5))) for r in range(0, 25, 5))
+    for part in (Part1, Part2):
+        part().check(repeated, 2385)
+        part(closed_form=True).check(repeated, 2385)
+
 
 if __name__ == '__main__':
     EXAMPLE_INPUT = """7,4,9,5,11,17,23,2,0,14,21,24,10,16,13,6,15,25,12,22,18,20,8,19,3,26,1
@@ -1,68 +1,208 @@
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+
 import numpy as np
 
+from bulk import parse_ints
 from puzzle import Puzzle
 
 
 class Day05(Puzzle):
-    def __init__(self, part):
+    input_mode = "buffer"
+
+    def __init__(self, part, sparse=False):
         super().__init__(f"Day 5, Part {part}")
+        self.count_overlaps = count_overlaps_sparse if sparse else count_overlaps
 
-    def parse_line(self, line):
-        nums = ','.join(line.split(' -> '))
-        xa, ya, xb, yb = map(int, nums.split(','))
-        return xa, ya, xb, yb
+    def load_segments(self, input):
+        return parse_ints(input).reshape(-1, 4)
 
 
 class Part1(Day05):
-    def __init__(self):
-        super().__init__(1)
+    def __init__(self, sparse=False):
+        super().__init__(1, sparse)
 
     def solve(self, input):
-        field = np.zeros((999, 999), dtype=int)
-        maxx, maxy = 0, 0
-        for line in input:
-            x1, y1, x2, y2 = self.parse_line(line)
-            maxx = max(maxx, x1, x2)
-            maxy = max(maxy, y1, y2)
-            if x1 == x2:
-                y1, y2 = sorted([y1, y2])
-                field[x1, y1:y2+1] += 1
-            if y1 == y2:
-                x1, x2 = sorted([x1, x2])
-                field[x1:x2+1, y1] += 1
-        field = field[:maxx+1, :maxy+1]
-
-        return np.sum(field > 1)
+        segments = self.load_segments(input)
+        x1, y1, x2, y2 = segments.T
+        return self.count_overlaps(segments[(x1 == x2) | (y1 == y2)])
 
 
 class Part2(Day05):
-    def __init__(self):
-        super().__init__(2)
+    def __init__(self, sparse=False):
+        super().__init__(2, sparse)
 
     def solve(self, input):
-        field = np.zeros((999, 999), dtype=int)
-        maxx, maxy = 0, 0
-        for line in input:
-            x1, y1, x2, y2 = self.parse_line(line)
-            maxx = max(maxx, x1, x2)
-            maxy = max(maxy, y1, y2)
-            dx = np.sign(x2 - x1)
-            dy = np.sign(y2 - y1)
-            while x1 != x2 or y1 != y2:
-                field[x1, y1] += 1
-                x1 += dx
-                y1 += dy
-            field[x2, y2] += 1
-        field = field[:maxx+1, :maxy+1]
-
-        return np.sum(field > 1)
+        return self.count_overlaps(self.load_segments(input))
+
+
+def count_overlaps(segments):
+    """Number of points covered by at least two horizontal, vertical or diagonal segments."""
+    xs, ys = rasterize(segments)
+    if len(xs) == 0:
+        return 0
+    width = xs.max() + 1
+    counts = np.bincount(ys * width + xs)
+    return int(np.count_nonzero(counts > 1))
+
+
+def rasterize(segments):
+    """x and y coordinates of all points covered by the segments, all at once."""
+    x1, y1, x2, y2 = segments.T
+    dx = np.sign(x2 - x1)
+    dy = np.sign(y2 - y1)
+    lengths = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) + 1
+
+    # step number of every point along its segment
+    segment = np.repeat(np.arange(len(segments)), lengths)
+    step = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    xs = x1[segment] + dx[segment] * step
+    ys = y1[segment] + dy[segment] * step
+    return xs, ys
+
+
+# Every segment lies on a line a*x + b*y = key of one of these families.
+# Positions along a line are given by x, except for vertical lines, where it's y.
+HORIZONTAL, VERTICAL, DIAGONAL, ANTIDIAGONAL = (0, 1), (1, 0), (1, -1), (1, 1)
+FAMILIES = (HORIZONTAL, VERTICAL, DIAGONAL, ANTIDIAGONAL)
+
+SHIFT = 2**32  # packs a (key, position) pair into one sortable int64
+
+
+def count_overlaps_sparse(segments):
+    """Like count_overlaps, but without a grid, so memory doesn't depend on the area.
+
+    Within each family of lines, a sweep over interval start and end events gives
+    the points covered at least once and at least twice. Points covered by lines of
+    two families are found by an orthogonal sweep per pair of families, where lines
+    of one family are horizontal and the other's vertical in (key_a, key_b)
+    coordinates.
+    """
+    x1, y1, x2, y2 = segments.T
+    dx, dy = x2 - x1, y2 - y1
+    family_of = np.select(
+        [dx == 0, dy == 0, np.sign(dx) == np.sign(dy)],
+        [FAMILIES.index(VERTICAL), FAMILIES.index(HORIZONTAL), FAMILIES.index(DIAGONAL)],
+        FAMILIES.index(ANTIDIAGONAL),
+    )
+
+    covered_once, covered_twice = [], []
+    for i, family in enumerate(FAMILIES):
+        mask = family_of == i
+        keys, t1 = line_coordinates(family, x1[mask], y1[mask])
+        _, t2 = line_coordinates(family, x2[mask], y2[mask])
+        lo, hi = np.minimum(t1, t2), np.maximum(t1, t2)
+        covered_once.append(covered_intervals(keys, lo, hi, 1))
+        covered_twice.append(covered_intervals(keys, lo, hi, 2))
+
+    total = sum(int((hi - lo + 1).sum()) for _, lo, hi in covered_twice)
+
+    points = [
+        crossings(fa, covered_once[a], fb, covered_once[b])
+        for (a, fa), (b, fb) in combinations(enumerate(FAMILIES), 2)
+    ]
+    xs, ys = np.unique(np.concatenate(points), axis=0).T
+
+    # Every crossing point counts once. Those covered twice within a family were
+    # already counted in `total`, once per such family.
+    for family, (keys, lo, hi) in zip(FAMILIES, covered_twice):
+        total -= int(np.count_nonzero(contains(keys, lo, hi, *line_coordinates(family, xs, ys))))
+    return total + len(xs)
+
+
+def line_coordinates(family, x, y):
+    a, b = family
+    return a * x + b * y, (y if family == VERTICAL else x)
+
+
+def line_point(family, key, t):
+    match family:
+        case (0, 1): return t, key
+        case (1, 0): return key, t
+        case (1, -1): return t, t - key
+        case (1, 1): return t, key - t
+
+
+def covered_intervals(keys, lo, hi, min_count):
+    """Disjoint (keys, lo, hi) intervals where at least `min_count` of the given intervals overlap."""
+    key = np.concatenate([keys, keys])
+    t = np.concatenate([lo, hi + 1])
+    delta = np.concatenate([np.ones_like(lo), -np.ones_like(hi)])
+    order = np.lexsort((t, key))
+    key, t, delta = key[order], t[order], delta[order]
+
+    # between two events of the same line, the coverage is constant
+    coverage = np.cumsum(delta)[:-1]
+    inside = (coverage >= min_count) & (t[1:] > t[:-1])
+    key, lo, hi = key[:-1][inside], t[:-1][inside], t[1:][inside] - 1
+
+    # merge touching pieces
+    starts = np.ones(len(key), dtype=bool)
+    starts[1:] = (key[1:] != key[:-1]) | (lo[1:] != hi[:-1] + 1)
+    ends = np.roll(starts, -1)
+    return key[starts], lo[starts], hi[ends]
+
+
+def contains(keys, lo, hi, key, t):
+    """Whether each (key, t) lies in one of the disjoint, sorted intervals."""
+    if len(keys) == 0:
+        return np.zeros(len(key), dtype=bool)
+    i = np.searchsorted(keys * SHIFT + lo, key * SHIFT + t, side="right") - 1
+    found = i >= 0
+    i = np.maximum(i, 0)
+    return found & (keys[i] == key) & (hi[i] >= t)
+
+
+def crossings(family_a, intervals_a, family_b, intervals_b):
+    """(x, y) of all lattice points covered by both an interval of family a and one of family b."""
+    keys_a, lo_a, hi_a = intervals_a
+    keys_b, lo_b, hi_b = intervals_b
+
+    # extent of each interval in the key of the other family
+    ends_a = [line_coordinates(family_b, *line_point(family_a, keys_a, t))[0] for t in (lo_a, hi_a)]
+    ends_b = [line_coordinates(family_a, *line_point(family_b, keys_b, t))[0] for t in (lo_b, hi_b)]
+
+    ENTER, QUERY, LEAVE = 0, 1, 2
+    events = [(lo, ENTER, k) for k, lo in zip(keys_a.tolist(), np.minimum(*ends_a).tolist())]
+    events += [(hi, LEAVE, k) for k, hi in zip(keys_a.tolist(), np.maximum(*ends_a).tolist())]
+    events += [
+        (k, QUERY, (lo, hi))
+        for k, lo, hi in zip(keys_b.tolist(), np.minimum(*ends_b).tolist(), np.maximum(*ends_b).tolist())
+    ]
+    events.sort()
+
+    # sweep along the key of family b, keeping the keys of family a that are crossed
+    active = []
+    found_a, found_b = [], []
+    for position, kind, data in events:
+        if kind == ENTER:
+            active.insert(bisect_left(active, data), data)
+        elif kind == LEAVE:
+            del active[bisect_left(active, data)]
+        else:
+            lo, hi = data
+            hits = active[bisect_left(active, lo) : bisect_right(active, hi)]
+            found_a += hits
+            found_b += [position] * len(hits)
+
+    # solve key_a = a1*x + b1*y, key_b = a2*x + b2*y; diagonals and antidiagonals
+    # may cross between lattice points
+    (a1, b1), (a2, b2) = family_a, family_b
+    ka, kb = np.array(found_a, dtype=np.int64), np.array(found_b, dtype=np.int64)
+    det = a1 * b2 - b1 * a2
+    xn, yn = ka * b2 - b1 * kb, a1 * kb - ka * a2
+    on_lattice = (xn % det == 0) & (yn % det == 0)
+    return np.stack([xn[on_lattice] // det, yn[on_lattice] // det], axis=1)
 
 
 def main():
     Part1().check(EXAMPLE_INPUT, 5)
+    Part1(sparse=True).check(EXAMPLE_INPUT, 5)
     Part1().run("inputs/day05.txt")
 
     Part2().check(EXAMPLE_INPUT, 12)
+    Part2(sparse=True).check(EXAMPLE_INPUT, 12)
     Part2().run("inputs/day05.txt")
 
 
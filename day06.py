@@ -17,32 +17,96 @@ class Part1(Day06):
         school = School(8)
         for x in map(int, next(input).split(',')):
             school.add_fish(x)
-        for _ in range(self.n_steps):
-            school.step()
+        school.advance(self.n_steps)
         return school.total_fish()
 
 
+RESET_TIMER = 6
+
+
 class School:
     def __init__(self, max_timer):
-        self.fish_with_time = [0] * (1 + max_timer)
+        # ring buffer: the fish with timer t are counted in fish[(offset + t) % len(fish)]
+        self.fish = [0] * (1 + max_timer)
+        self.offset = 0
         self.times = tuple(range(1+max_timer))
+        self.transition_powers = [self.transition_matrix()]
+
+    @property
+    def fish_with_time(self):
+        return self.fish[self.offset:] + self.fish[:self.offset]
+
+    @fish_with_time.setter
+    def fish_with_time(self, fish):
+        self.fish = list(fish)
+        self.offset = 0
 
     def add_fish(self, timer, n=1):
-        self.fish_with_time[timer] += n
+        self.fish[(self.offset + timer) % len(self.fish)] += n
 
     def total_fish(self):
-        return sum(self.fish_with_time)
+        return sum(self.fish)
 
     def step(self):
-        updated_fish = []
+        # Decreasing all timers just moves the start of the ring buffer. The 0-timer
+        # fish end up in the slot for the highest timer, which makes them their own
+        # offspring; they themselves are added back at the reset timer.
+        spawning = self.offset
+        self.offset = (self.offset + 1) % len(self.fish)
+        self.fish[(self.offset + RESET_TIMER) % len(self.fish)] += self.fish[spawning]
+
+    def advance(self, n_days):
+        # same as calling step() n_days times, but with O(log n_days) matrix products
+        fish = np.array(self.fish_with_time, dtype=object)  # Python ints don't overflow
+        for bit in range(n_days.bit_length()):
+            if bit == len(self.transition_powers):
+                last = self.transition_powers[-1]
+                self.transition_powers.append(last @ last)
+            if n_days >> bit & 1:
+                fish = self.transition_powers[bit] @ fish
+        self.fish_with_time = fish.tolist()
+
+    def transition_matrix(self):
+        # the linear map performed by step()
+        matrix = np.zeros((len(self.times), len(self.times)), dtype=object)
         for t in self.times[:-1]:
-            # decrease timer of all fish
-            updated_fish.append(self.fish_with_time[t+1])
-        # 0-timer fish spawn one new fish
-        updated_fish.append(self.fish_with_time[0])
-        # wrap 0-timer fish spawn
-        updated_fish[6] += self.fish_with_time[0]
-        self.fish_with_time = updated_fish
+            matrix[t, t+1] = 1
+        matrix[-1, 0] = 1
+        matrix[RESET_TIMER, 0] += 1
+        return matrix
+
+
+class SchoolBatch:
+    """Many independent schools, one per row of `fish`, stepped together.
+
+    `fish[i, t]` is the number of fish with timer t in school i. Use dtype=object
+    for exact counts when int64 would overflow.
+    """
+
+    def __init__(self, fish, dtype=np.int64):
+        self.fish = np.array(fish, dtype=dtype)
+        self.offset = 0
+
+    @classmethod
+    def from_timers(cls, schools, max_timer=8, dtype=np.int64):
+        fish = np.zeros((len(schools), 1 + max_timer), dtype=dtype)
+        for i, timers in enumerate(schools):
+            for t in timers:
+                fish[i, t] += 1
+        return cls(fish, dtype)
+
+    def fish_with_time(self):
+        return np.roll(self.fish, -self.offset, axis=1)
+
+    def total_fish(self):
+        return self.fish.sum(axis=1)
+
+    def step(self, n_days=1):
+        n_timers = self.fish.shape[1]
+        for _ in range(n_days):
+            spawning = self.offset
+            self.offset = (self.offset + 1) % n_timers
+            self.fish[:, (self.offset + RESET_TIMER) % n_timers] += self.fish[:, spawning]
 
 
 def main():
@@ -53,6 +117,20 @@ def main():
     Part1(256, part=2).check(EXAMPLE_INPUT, 26984457539)
     Part1(256, part=2).run("inputs/day06.txt")
 
+    timers = list(map(int, EXAMPLE_INPUT.split(",")))
+    batch = SchoolBatch.from_timers([timers, timers[:1], []])
+    batch.step(18)
+    totals = batch.total_fish().tolist()
+    assert totals == [26, Part1(18).solve(iter([EXAMPLE_INPUT[:1]])), 0], totals
+    school = School(8)
+    for t in timers:
+        school.add_fish(t)
+    school.advance(18)
+    assert batch.fish_with_time()[0].tolist() == school.fish_with_time, batch.fish_with_time()
+    batch = SchoolBatch.from_timers([timers], dtype=object)
+    batch.step(256)
+    assert batch.total_fish().tolist() == [26984457539], batch.total_fish()
+
 
 if __name__ == '__main__':
     EXAMPLE_INPUT = """3,4,3,1,2"""
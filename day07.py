@@ -1,53 +1,139 @@
+import sys
+import time
+
 import numpy as np
 
+from bulk import parse_ints
 from puzzle import Puzzle
 
 
 class Day07(Puzzle):
-    def __init__(self, part):
+    input_mode = "buffer"
+
+    def __init__(self, part, search=False):
         super().__init__(f"Day 7, Part {part}")
+        self.search = search
+
+    def load_numbers(self, input):
+        return parse_ints(input)
+
+    def use_search(self, numbers):
+        # the histogram covers the whole range of positions, too big for sparse, wide inputs
+        return self.search or int(numbers.max()) - int(numbers.min()) > 4 * len(numbers) + 2**20
 
 
 class Part1(Day07):
-    def __init__(self, part=1):
-        super().__init__(part)
+    def __init__(self, part=1, search=False):
+        super().__init__(part, search)
 
     def solve(self, input):
-        numbers = np.array(list(map(int, next(input).split(','))))
-        candidate_pos = np.median(numbers)
-        return int(self.compute_fuel(numbers, candidate_pos))
-
-    def compute_fuel(self, numbers, pos):
-        return np.sum(np.abs(numbers - pos))
+        numbers = self.load_numbers(input)
+        if self.use_search(numbers):
+            return minimize_fuel(numbers, linear_cost)
+        linear, _ = fuel_costs(numbers)
+        return int(linear.min())
 
 
 class Part2(Day07):
-    def __init__(self, part=2):
-        super().__init__(part)
+    def __init__(self, part=2, search=False):
+        super().__init__(part, search)
 
     def solve(self, input):
-        numbers = np.array(list(map(int, next(input).split(','))))
-        candidate_pos = int(np.round(np.mean(numbers)))
-        all_costs = []
-        for p in range(candidate_pos-1, candidate_pos+1):
-            fc = self.compute_fuel(numbers, p)
-            all_costs.append(fc)
-        return int(np.min(all_costs))
-
-    def compute_fuel(self, numbers, pos):
-        dist = np.abs(numbers - pos)
-        cost = dist * (dist + 1) / 2
-        return np.sum(cost)
+        numbers = self.load_numbers(input)
+        if self.use_search(numbers):
+            return minimize_fuel(numbers, triangular_cost)
+        _, triangular = fuel_costs(numbers)
+        return int(triangular.min())
+
+
+def linear_cost(distance):
+    return distance
+
+
+def triangular_cost(distance):
+    return distance * (distance + 1) // 2
+
+
+def minimize_fuel(numbers, cost):
+    """Minimum total fuel for any convex, non-negative per-crab cost of the distance.
+
+    The total is convex in the position too, so the optimum is the first position
+    where moving one step right no longer gets cheaper, found by bisection over
+    O(log range) vectorized evaluations.
+    """
+    lo, hi = int(numbers.min()), int(numbers.max())
+    # a convex cost is largest at one end of the possible distances; fall back to
+    # Python ints if the total could overflow int64
+    if max(cost(0), cost(hi - lo)) * len(numbers) >= 2**62:
+        numbers = numbers.astype(object)
+
+    def total_fuel(pos):
+        return int(cost(np.abs(numbers - pos)).sum())
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if total_fuel(mid + 1) >= total_fuel(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return total_fuel(lo)
+
+
+def fuel_costs(numbers):
+    """Exact linear and triangular fuel cost of every position between the outermost crabs.
+
+    Both come from a histogram of the crab positions in O(n + range): the linear
+    cost from prefix counts and sums of the crabs left of each position, and the
+    triangular cost d*(d+1)/2 from the linear cost plus the sum of squared distances.
+    """
+    lo = numbers.min()
+    counts = np.bincount(numbers - lo)
+    n, width = len(numbers), len(counts)
+    # Python ints where int64 could overflow
+    dtype = np.int64 if n * width**2 < 2**61 else object
+    counts = counts.astype(dtype)
+    positions = np.arange(width).astype(dtype)
+
+    weights = counts * positions
+    count_below = np.cumsum(counts) - counts
+    sum_below = np.cumsum(weights) - weights
+    count_above = n - count_below - counts
+    sum_above = weights.sum() - sum_below - weights
+    linear = positions * count_below - sum_below + sum_above - positions * count_above
+
+    squares = (weights * positions).sum() - 2 * positions * weights.sum() + n * positions**2
+    triangular = (squares + linear) // 2
+    return linear, triangular
+
+
+def benchmark(n_crabs=10**7, max_pos=2000, seed=0):
+    numbers = np.random.default_rng(seed).integers(0, max_pos, n_crabs)
+    for name, method in [
+        ("histogram", lambda: [int(c.min()) for c in fuel_costs(numbers)]),
+        ("search", lambda: [minimize_fuel(numbers, linear_cost), minimize_fuel(numbers, triangular_cost)]),
+    ]:
+        start = time.perf_counter()
+        result = method()
+        print(f"{name:>10}: {time.perf_counter() - start:.3f}s  {result}")
 
 
 def main():
     Part1().check(EXAMPLE_INPUT, 37)
+    Part1(search=True).check(EXAMPLE_INPUT, 37)
     Part1().run("inputs/day07.txt")
     Part2().check(EXAMPLE_INPUT, 168)
+    Part2(search=True).check(EXAMPLE_INPUT, 168)
     Part2().run("inputs/day07.txt")
 
+    # too wide for a histogram
+    Part1().check("0,3000000000", 3000000000)
+    Part2().check("0,3000000000", 2250000001500000000)
+
 
 if __name__ == '__main__':
     EXAMPLE_INPUT = """16,1,2,0,4,2,7,1,2,14"""
 
-    main()
+    if sys.argv[1:] == ["--bench"]:
+        benchmark()
+    else:
+        main()
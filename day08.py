@@ -1,25 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+
+import numpy as np
+
+from bulk import line_ranges, map_file
 from puzzle import Puzzle
 
+BLOCK_SIZE = 2**24
+
 
 class Day08(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self, part):
         super().__init__(f"Day 8, Part {part}")
 
-    def parse_line(self, line):
-        patterns, outputs = line.split(" | ")
-        return patterns.split(), outputs.split()
-
 
 class Part1(Day08):
     def __init__(self, part=1):
         super().__init__(part)
 
     def solve(self, input):
-        lines = map(self.parse_line, input)
-        outputs = flatten(map(lambda x: x[1], lines))
-        simple_digits = filter(lambda pat: len(pat) in (2, 3, 4, 7), outputs)
-        count = sum(1 for _ in simple_digits)
-        return count
+        # one block at a time, to bound the size of the temporary arrays
+        n_blocks = len(input) // BLOCK_SIZE + 1
+        return sum(count_simple_outputs(input[start:end]) for start, end in line_ranges(input, n_blocks))
+
+    def solve_parallel(self, filename, workers=None):
+        with map_file(filename) as buf:
+            n_blocks = max(len(buf) // BLOCK_SIZE + 1, 4 * (workers or os.cpu_count()))
+            ranges = line_ranges(buf, n_blocks)
+        with ProcessPoolExecutor(workers) as pool:
+            return sum(pool.map(partial(count_simple_outputs_in_file, filename), ranges))
 
 
 class Part2(Day08):
@@ -27,65 +39,13 @@ class Part2(Day08):
         super().__init__(part)
 
     def solve(self, input):
-        lines = list(map(self.parse_line, input))
-        patterns = map(lambda x: normalize_patterns(x[0]), lines)
-        outputs = map(lambda x: normalize_patterns(x[1]), lines)
-
-        mappings = map(self.fit_code, patterns)
-
-        decoded = map(
-            lambda x: (str(self.decode(x[0], o)) for o in x[1]), zip(mappings, outputs)
-        )
-        str_decoded = map(lambda x: "".join(x), decoded)
-        int_decoded = map(int, str_decoded)
-        return sum(int_decoded)
-
-    def decode(self, mapping, pattern):
-        return DIGIT_PATTERNS.index(self.activations(mapping, pattern))
-
-    def fit_code(self, patterns):
-        solutions = list(self.backtrack("", patterns))
-        assert len(solutions) == 1
-        return solutions[0]
-
-    def backtrack(self, partial_mapping, patterns):
-        if self.reject(partial_mapping, patterns):
-            return
-        if self.accept(partial_mapping, patterns):
-            yield partial_mapping
-        for s in self.extensions(partial_mapping):
-            yield from self.backtrack(s, patterns)
-
-    def reject(self, partial_mapping, patterns):
-        if not partial_mapping:
-            return False
-        # make sure the last added mapping has the right number
-        # of activations for this position
-        x = partial_mapping[-1]
-        n = ACTIVATION_COUNTS[len(partial_mapping) - 1]
-        c = sum(x in p for p in patterns)
-        return c != n
-
-    def accept(self, mapping, patterns):
-        if len(mapping) < 7:
-            return False
-        for p in patterns:
-            if self.activations(mapping, p) not in DIGIT_PATTERNS:
-                return False
-        return True
-
-    def extensions(self, partial_mapping):
-        unmapped = WIRES.difference(partial_mapping)
-        for x in unmapped:
-            yield partial_mapping + x
-
-    def activations(self, mapping, pattern):
-        return "".join("1" if x in pattern else "0" for x in mapping)
-
-
-WIRES = set("abcdefg")
+        masks = parse_displays(input)
+        segments = deduce_segments(masks[:, :10])
+        digits = DECODE_TABLE[translate(masks[:, 10:], segments)]
+        return int((digits @ [1000, 100, 10, 1]).sum())
 
 
+# segments a-g of every digit; a pattern's bit mask has bit i set for the i-th letter
 DIGIT_PATTERNS = [
     "1110111",  # 0
     "0010010",  # 1
@@ -101,20 +61,81 @@ DIGIT_PATTERNS = [
     # 8687497
 ]
 
-ACTIVATION_COUNTS = [8, 6, 8, 7, 4, 9, 7]
+DECODE_TABLE = np.full(128, -1)
+for digit, pattern in enumerate(DIGIT_PATTERNS):
+    DECODE_TABLE[int(pattern[::-1], 2)] = digit
+
+POPCOUNT = np.array([bin(m).count("1") for m in range(128)])
+
+LETTER_BITS = np.zeros(256, dtype=np.uint8)
+LETTER_BITS[ord("a") : ord("g") + 1] = 1 << np.arange(7)
+
+SEGMENT_A, SEGMENT_B, SEGMENT_C, SEGMENT_D, SEGMENT_E, SEGMENT_F, SEGMENT_G = range(7)
+
+
+def parse_displays(buf):
+    """Bit masks of the 10 patterns and 4 outputs of every line, shape (lines, 14)."""
+    bits = LETTER_BITS[np.frombuffer(buf, dtype=np.uint8)]
+    letters = np.flatnonzero(bits)
+    starts = np.flatnonzero(np.diff(letters, prepend=-2) != 1)
+    return np.bitwise_or.reduceat(bits[letters], starts).reshape(-1, 14)
+
+
+def deduce_segments(patterns):
+    """The segment driven by each wire, shape (lines, 7), from the 10 patterns of each line.
+
+    Across all ten digits, segments b, e and f are lit a unique number of times
+    (6, 4 and 9). Of the two segments lit 8 times, only c is part of the
+    two-wire digit 1, and of those lit 7 times, only d is part of the four-wire 4.
+    """
+    frequency = wire_bits(patterns).sum(axis=1, dtype=np.uint8)
+    lengths = POPCOUNT[patterns]
+    one = wire_bits(np.where(lengths == 2, patterns, 0).max(axis=1)) == 1
+    four = wire_bits(np.where(lengths == 4, patterns, 0).max(axis=1)) == 1
+    return np.select(
+        [frequency == 6, frequency == 4, frequency == 9, (frequency == 8) & one, frequency == 8, (frequency == 7) & four],
+        [SEGMENT_B, SEGMENT_E, SEGMENT_F, SEGMENT_C, SEGMENT_A, SEGMENT_D],
+        SEGMENT_G,
+    )
+
+
+def translate(masks, segments):
+    """Wire masks, shape (lines, n), to segment masks using each line's wire-to-segment map."""
+    return (wire_bits(masks) << segments[:, None, :]).sum(axis=2)
+
+
+def wire_bits(masks):
+    """Split bit masks into a trailing axis of 7 zeros and ones."""
+    return (masks[..., None] >> np.arange(7, dtype=np.uint8)) & 1
+
 
+def count_simple_outputs(buf):
+    """Number of output tokens (after the "|") with 2, 3, 4 or 7 segments, in a block of whole lines."""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    # output is everything after the last "|", unless a newline came since
+    index = np.arange(len(data))
+    last_bar = np.maximum.accumulate(np.where(data == ord("|"), index, -1))
+    last_newline = np.maximum.accumulate(np.where(data == ord("\n"), index, -1))
+    in_output = last_bar > last_newline
 
-def flatten(it):
-    for x in it:
-        yield from x
+    letters = np.zeros(len(data) + 2, dtype=bool)
+    letters[1:-1] = in_output & (data >= ord("a")) & (data <= ord("g"))
+    # token starts and ends alternate
+    edges = np.flatnonzero(letters[1:] != letters[:-1])
+    lengths = edges[1::2] - edges[::2]
+    return int(np.isin(lengths, (2, 3, 4, 7)).sum())
 
 
-def normalize_patterns(seq):
-    return ["".join(sorted(x)) for x in seq]
+def count_simple_outputs_in_file(filename, byte_range):
+    start, end = byte_range
+    with map_file(filename) as buf:
+        return count_simple_outputs(buf[start:end])
 
 
 def main():
     Part1().check(EXAMPLE_INPUT, 26)
+    Part1().check(EXAMPLE_INPUT.splitlines()[0] + "\n\n" + EXAMPLE_INPUT.splitlines()[0], 4)
+    Part1().check_file(EXAMPLE_INPUT, 26, "solve_parallel", workers=2)
     Part1().run("inputs/day08.txt")
     Part2().check(EXAMPLE_INPUT, 61229)
     Part2().run("inputs/day08.txt")
@@ -1,14 +1,20 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 
+from bulk import digit_grid_view, map_file, parse_digit_grid
 from puzzle import Puzzle
 
 
 class Day09(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self, part):
         super().__init__(f"Day 9, Part {part}")
 
     def load_array(self, input):
-        return np.array(list(list(x) for x in input)).astype(int)
+        return parse_digit_grid(input)
 
 
 class Part1(Day09):
@@ -19,6 +25,10 @@ class Part1(Day09):
         data = self.load_array(input)
         return (data[minima(data)] + 1).sum()
 
+    def solve_tiled(self, filename, tile_size=1024, workers=None):
+        risk, _ = scan_tiled(filename, tile_size, workers)
+        return risk
+
 
 def minima(data):
     padded = np.pad(data, 1, constant_values=99)
@@ -44,41 +54,130 @@ class Part2(Day09):
 
     def solve(self, input):
         data = self.load_array(input)
-        seeds = list(zip(*np.where(minima(data))))
-
-        basin_sizes = []
-        for seed in seeds:
-            basin = find_basin(seed, data)
-            basin_sizes.append(basin.sum())
-
-        basin_sizes = sorted(basin_sizes)
-        return np.prod(basin_sizes[-3:])
-
-
-def find_basin(seed, data):
-    rows, cols = data.shape
-    basin = np.zeros_like(data)
-    queue = [seed]
-    while queue:
-        pos = queue.pop()
-        if pos[0] < 0 or pos[1] < 0 or pos[0] >= rows or pos[1] >= cols:
-            continue
-        if basin[pos]:
-            continue
-        if data[pos] >= 9:
-            continue
-        basin[pos] = True
-        queue.append((pos[0] - 1, pos[1]))
-        queue.append((pos[0] + 1, pos[1]))
-        queue.append((pos[0], pos[1] - 1))
-        queue.append((pos[0], pos[1] + 1))
-    return basin
+        labels = label_basins(data)
+        basin_sizes = np.bincount(labels[data < 9])
+        # one basin per low point, like flooding from each of them
+        seed_sizes = np.sort(basin_sizes[labels[minima(data)]])
+        return int(np.prod(seed_sizes[-3:]))
+
+    def solve_tiled(self, filename, tile_size=1024, workers=None):
+        _, seed_sizes = scan_tiled(filename, tile_size, workers)
+        return int(np.prod(np.sort(seed_sizes)[-3:]))
+
+
+def label_basins(data):
+    """Label every cell with the smallest flat index in its basin, all basins at once.
+
+    Basins are the 4-connected regions of heights below 9. They are found with a
+    vectorized union-find: each round links the larger root of every edge to the
+    smaller one, then compresses paths by pointer jumping, until all edges agree.
+    Cells of height 9 keep their own index.
+    """
+    is_open = data < 9
+    index = np.arange(data.size).reshape(data.shape)
+    horizontal = is_open[:, 1:] & is_open[:, :-1]
+    vertical = is_open[1:, :] & is_open[:-1, :]
+    a = np.concatenate([index[:, :-1][horizontal], index[:-1, :][vertical]])
+    b = np.concatenate([index[:, 1:][horizontal], index[1:, :][vertical]])
+    return connected_roots(data.size, a, b).reshape(data.shape)
+
+
+def connected_roots(n, a, b):
+    """Smallest member of the connected component of each of n nodes, given edges a[i]-b[i]."""
+    parent = np.arange(n)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        root_a, root_b = root_a[differ], root_b[differ]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return parent
+
+
+def scan_tiled(filename, tile_size=1024, workers=None):
+    """Low point risk sum and basin size per low point, without loading the whole map.
+
+    The memory-mapped map is processed in tiles, in parallel unless workers=1. Each
+    tile finds its low points with a one-cell halo and labels its own basins. Basins
+    that continue across tile borders are merged with a union-find over the basin
+    labels found along the borders.
+    """
+    with map_file(filename) as buf:
+        grid = digit_grid_view(buf)
+        rows, cols = grid.shape
+        del grid
+    row_starts, col_starts = range(0, rows, tile_size), range(0, cols, tile_size)
+    tiles = [((r, min(r + tile_size, rows)), (c, min(c + tile_size, cols))) for r in row_starts for c in col_starts]
+
+    scan = partial(scan_tile, filename)
+    if workers == 1:
+        results = list(map(scan, tiles))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(scan, tiles))
+
+    offsets = np.cumsum([0] + [len(sizes) for _, sizes, _, _ in results])
+    n_tile_cols = len(col_starts)
+    a, b = [], []
+
+    def link(edge_a, offset_a, edge_b, offset_b):
+        both = (edge_a >= 0) & (edge_b >= 0)
+        a.append(edge_a[both] + offset_a)
+        b.append(edge_b[both] + offset_b)
+
+    for i, (_, _, _, (top, bottom, left, right)) in enumerate(results):
+        if (i + 1) % n_tile_cols:
+            link(right, offsets[i], results[i + 1][3][2], offsets[i + 1])
+        if i + n_tile_cols < len(results):
+            link(bottom, offsets[i], results[i + n_tile_cols][3][0], offsets[i + n_tile_cols])
+
+    roots = connected_roots(offsets[-1], np.concatenate(a + [[]]).astype(int), np.concatenate(b + [[]]).astype(int))
+    basin_sizes = np.zeros(offsets[-1], dtype=np.int64)
+    np.add.at(basin_sizes, roots, np.concatenate([sizes for _, sizes, _, _ in results]))
+    low_points = np.concatenate([low_points for _, _, low_points, _ in results])
+
+    risk = sum(risk for risk, _, _, _ in results)
+    return risk, np.repeat(basin_sizes[roots], low_points)
+
+
+def scan_tile(filename, tile):
+    """Risk sum, basin sizes, low points per basin and border labels of one tile."""
+    (r0, r1), (c0, c1) = tile
+    with map_file(filename) as buf:
+        grid = digit_grid_view(buf)
+        h0, w0 = max(r0 - 1, 0), max(c0 - 1, 0)
+        with_halo = (grid[h0 : r1 + 1, w0 : c1 + 1] - ord("0")).astype(int)
+        del grid
+
+    core = (slice(r0 - h0, r1 - h0), slice(c0 - w0, c1 - w0))
+    data = with_halo[core]
+    is_minimum = minima(with_halo)[core]
+    risk = int((data[is_minimum] + 1).sum())
+
+    is_open = data < 9
+    _, local = np.unique(label_basins(data)[is_open], return_inverse=True)
+    labels = np.full(data.shape, -1)
+    labels[is_open] = local
+    sizes = np.bincount(local)
+    low_points = np.bincount(labels[is_minimum & is_open], minlength=len(sizes))
+
+    borders = labels[0, :], labels[-1, :], labels[:, 0], labels[:, -1]
+    return risk, sizes, low_points, borders
 
 
 def main():
     Part1().check(EXAMPLE_INPUT, 15)
+    Part1().check_file(EXAMPLE_INPUT, 15, "solve_tiled", tile_size=2, workers=1)
     Part1().run("inputs/day09.txt")
     Part2().check(EXAMPLE_INPUT, 1134)
+    Part2().check_file(EXAMPLE_INPUT, 1134, "solve_tiled", tile_size=2, workers=1)
+    Part2().check_file(EXAMPLE_INPUT, 1134, "solve_tiled", tile_size=3, workers=2)
     Part2().run("inputs/day09.txt")
 
 
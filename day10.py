@@ -1,10 +1,12 @@
-from more_itertools import peekable
-import numpy as np
+import heapq
 
+from bulk import map_file
 from puzzle import Puzzle
 
 
 class Day10(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self, part):
         super().__init__(f"Day 10, Part {part}")
 
@@ -14,20 +16,7 @@ class Part1(Day10):
         super().__init__(part)
 
     def solve(self, input):
-        line_scores = map(score_syntax, input)
-        return sum(line_scores)
-
-
-def score_syntax(line):
-    stack = []
-    for ch in line:
-        if ch in "([{<":
-            stack.append(ch)
-        if ch in ")]}>":
-            top = stack.pop()
-            if MATCHING_PAIRS[top] != ch:
-                return CHECK_SCORES[ch]
-    return 0
+        return sum(syntax for syntax, _ in validate_lines(input))
 
 
 class Part2(Day10):
@@ -35,29 +24,87 @@ class Part2(Day10):
         super().__init__(part)
 
     def solve(self, input):
-        line_scores = list(map(score_completion, input))
-        scores = filter(lambda x: x is not None, line_scores)
-        scores = list(scores)
-        return np.median(scores).astype('int64')
-
-
-def score_completion(line):
-    stack = []
-    for ch in line:
-        if ch in "([{<":
-            stack.append(ch)
-        if ch in ")]}>":
-            top = stack.pop()
-            if MATCHING_PAIRS[top] != ch:
-                return None
-
-    completion_chars = (MATCHING_PAIRS[ch] for ch in stack[::-1])
-    points = (COMPLETION_SCORES[ch] for ch in completion_chars)
-    total_score = 0
-    for p in points:
-        total_score *= 5
-        total_score += p
-    return total_score
+        scores = RunningMedian()
+        for _, completion in validate_lines(input):
+            if completion is not None:
+                scores.add(completion)
+        return scores.median()
+
+
+class RunningMedian:
+    """Exact median of a stream of ints, kept in two heaps around the middle.
+
+    For an even count, the median is the mean of the two middle values, rounded down.
+    """
+
+    def __init__(self):
+        self.lower = []  # max-heap of the smaller half, as negated values
+        self.upper = []  # min-heap of the larger half, never bigger than the lower half
+
+    def __len__(self):
+        return len(self.lower) + len(self.upper)
+
+    def add(self, x):
+        if self.lower and x > -self.lower[0]:
+            heapq.heappush(self.upper, x)
+            if len(self.upper) > len(self.lower):
+                heapq.heappush(self.lower, -heapq.heappop(self.upper))
+        else:
+            heapq.heappush(self.lower, -x)
+            if len(self.lower) > len(self.upper) + 1:
+                heapq.heappush(self.upper, -heapq.heappop(self.lower))
+
+    def median(self):
+        if len(self.lower) > len(self.upper):
+            return -self.lower[0]
+        return (-self.lower[0] + self.upper[0]) // 2
+
+
+def validate_file(filename):
+    """(syntax score, completion score) of every line in the file, see validate_lines."""
+    with map_file(filename) as buf:
+        yield from validate_lines(buf)
+
+
+def validate_lines(buf):
+    """(syntax score, completion score) of every non-empty line in a buffer, in one pass.
+
+    Corrupted lines have completion score None, all others syntax score 0.
+    """
+    stack = bytearray()  # completion points of the pending closers, as base 5 digits
+    syntax = 0
+    in_line = False
+    with memoryview(buf) as view:
+        for byte in view:
+            action = ACTIONS[byte]
+            if action == NEWLINE:
+                if in_line:
+                    yield (syntax, None) if syntax else (0, completion_score(stack))
+                stack.clear()
+                syntax = 0
+                in_line = False
+                continue
+            in_line = True
+            if syntax or action == IGNORE:
+                continue
+            if action > 0:
+                stack.append(action)
+            elif not stack or stack.pop() != -action:
+                syntax = CHECK_POINTS[-action]
+    if in_line:
+        yield (syntax, None) if syntax else (0, completion_score(stack))
+
+
+def completion_score(stack):
+    return base5(stack[::-1]) if stack else 0
+
+
+def base5(digits):
+    # int() refuses to convert very long non-binary numbers, so split them up
+    if len(digits) <= 1000:
+        return int(digits, 5)
+    half = len(digits) // 2
+    return base5(digits[:half]) * 5 ** (len(digits) - half) + base5(digits[half:])
 
 
 MATCHING_PAIRS = {"(": ")", "[": "]", "{": "}", "<": ">"}
@@ -79,6 +126,19 @@ COMPLETION_SCORES = {
 }
 
 
+# Byte-indexed action table: openers push the completion points of their closer as
+# an ASCII digit, closers pop and compare against the negated digit.
+IGNORE, NEWLINE = 0, 1
+ACTIONS = [IGNORE] * 256
+ACTIONS[ord("\n")] = NEWLINE
+CHECK_POINTS = {}
+for opener, closer in MATCHING_PAIRS.items():
+    digit = ord(str(COMPLETION_SCORES[closer]))
+    ACTIONS[ord(opener)] = digit
+    ACTIONS[ord(closer)] = -digit
+    CHECK_POINTS[digit] = CHECK_SCORES[closer]
+
+
 def main():
     Part1().check(EXAMPLE_INPUT, 26397)
     Part1().run("inputs/day10.txt")
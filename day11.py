@@ -1,15 +1,18 @@
 from more_itertools import peekable
 import numpy as np
 
+from bulk import parse_digit_grid
 from puzzle import Puzzle
 
 
 class Day11(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self, part):
         super().__init__(f"Day 11, Part {part}")
 
     def load_array(self, input):
-        return np.array(list(map(list, input))).astype(int)
+        return parse_digit_grid(input)
 
 
 class Part1(Day11):
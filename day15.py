@@ -5,15 +5,18 @@ import heapq
 
 from tqdm import tqdm
 
+from bulk import parse_digit_grid
 from puzzle import Puzzle
 
 
 class Day15(Puzzle):
+    input_mode = "buffer"
+
     def __init__(self, part):
         super().__init__(f"Day 15, Part {part}")
 
     def load_array(self, input):
-        return np.array(list(map(list, input))).astype(int)
+        return parse_digit_grid(input)
 
     def path_search(self, grid, start=(0, 0)):
         # dijkstra
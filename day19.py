@@ -7,7 +7,7 @@ class Day19(Puzzle):
     def __init__(self, part):
         super().__init__(f"Day 19, Part {part}")
 
-    def load_data(self, input):
+    def parse(self, input):
         id = 0
         scanners = []
         while True:
@@ -26,9 +26,7 @@ class Day19(Puzzle):
             beacons.append(tuple(int(x) for x in line.split(',')))
         return np.array(beacons)
 
-    def compute(self, input):
-        data = self.load_data(input)
-
+    def compute(self, data):
         all_probes = set()
         all_probes.update(tuple(row) for row in data[0])
 
@@ -62,8 +60,8 @@ class Part1(Day19):
     def __init__(self, part=1):
         super().__init__(part)
 
-    def solve(self, input):
-        self.compute(input)
+    def solve_parsed(self, data):
+        self.compute(data)
         return len(self.all_probes)
 
 
@@ -71,8 +69,8 @@ class Part2(Day19):
     def __init__(self, part=2):
         super().__init__(part)
 
-    def solve(self, input):
-        self.compute(input)
+    def solve_parsed(self, data):
+        self.compute(data)
 
         max_dist = 0
 
@@ -12,6 +12,9 @@ class Day22(Puzzle):
         ranges = map(lambda mm: (mm[0], mm[1] + 1), ranges)
         return state, list(ranges)
 
+    def parse(self, input):
+        return list(map(self.parse_input, input))
+
     def compute_volume(self, steps):
         steps = list(steps)
 
@@ -37,18 +40,15 @@ class Part1(Day22):
     def __init__(self, part=1):
         super().__init__(part)
 
-    def solve(self, input):
-        steps = map(self.parse_input, input)
-        steps = (s for s, _ in zip(steps, range(PART1_LINES)))  # only use first N lines
-        return self.compute_volume(steps)
+    def solve_parsed(self, steps):
+        return self.compute_volume(steps[:PART1_LINES])  # only use first N lines
 
 
 class Part2(Day22):
     def __init__(self, part=1):
         super().__init__(part)
 
-    def solve(self, input):
-        steps = list(map(self.parse_input, input))
+    def solve_parsed(self, steps):
         return self.compute_volume(steps)
 
 
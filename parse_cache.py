@@ -0,0 +1,73 @@
+"""On-disk cache for the results of Puzzle.parse().
+
+Entries are pickled and keyed by the parser (file and qualified name), its
+`parser_version` and a hash of the input file, so editing an input or bumping
+the version invalidates them. When the cache grows beyond `max_bytes`, the
+least recently used entries are removed.
+"""
+import hashlib
+import os
+import pickle
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+class ParseCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, parser, version, filename):
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                digest.update(chunk)
+        source = os.path.splitext(os.path.basename(parser.__code__.co_filename))[0]
+        return f"{source}.{parser.__qualname__}-v{version}-{digest.hexdigest()}"
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(key) from None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass  # evicted by another process in the meantime
+        return data
+
+    def store(self, key, data):
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        # other processes may remove entries at any time, so skip those that vanish
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pickle"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+
+        total = 0
+        for _, size, path in entries:
+            total += size
+            if total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
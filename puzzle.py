@@ -1,29 +1,199 @@
-from datetime import datetime
+import copy
+import cProfile
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from bulk import map_file
+from parse_cache import ParseCache
+
+# opt-in profiling of the solve phase, e.g. `AOC_PROFILE=cprofile python day19.py`
+PROFILE = os.environ.get("AOC_PROFILE")
+PROFILE_TOP = 15
+
+# opt-in on-disk cache of parse() results, e.g. `AOC_PARSE_CACHE=.parse_cache python day19.py`
+PARSE_CACHE = ParseCache(os.environ["AOC_PARSE_CACHE"]) if os.environ.get("AOC_PARSE_CACHE") else None
 
 
 class Puzzle:
+    # "lines": solve gets an iterator of lines
+    # "buffer": solve gets the whole input as bytes-like buffer (see bulk.py)
+    input_mode = "lines"
+
+    # bump when parse() changes its output, to invalidate cached results
+    parser_version = 1
+
     def __init__(self, name):
         self.name = name
 
+    def parse(self, input):
+        return input
+
+    def solve(self, input):
+        return self.solve_parsed(self.parse(input))
+
     def check(self, input, expected):
-        start = datetime.now()
-        result = self.solve(iter(input.splitlines()))
+        start = time.perf_counter_ns()
+        if self.input_mode == "buffer":
+            result = self.solve(input.encode())
+        else:
+            result = self.solve(iter(input.splitlines()))
+        self.check_result(result, expected, start)
+
+    def check_file(self, input, expected, method="solve_file", **kwargs):
+        """Like check, for solvers that take a filename, e.g. check_file(..., "solve_parallel", workers=2)."""
+        start = time.perf_counter_ns()
+        with tempfile.NamedTemporaryFile("wt", suffix=".txt", delete=False) as f:
+            f.write(input)
+        try:
+            result = getattr(self, method)(f.name, **kwargs)
+        finally:
+            os.remove(f.name)
+        self.check_result(result, expected, start)
+
+    def check_result(self, result, expected, start):
         if result == expected:
-            print(f"{datetime.now() - start} -- OK  {result}")
+            print(f"{format_ns(time.perf_counter_ns() - start)} -- OK  {result}")
         else:
             raise AssertionError(f"expected {expected}, got {result}")
 
-    def run(self, filename=None, wrong=()):
-        start = datetime.now()
-        if filename is not None:
-            with open(filename, "rt") as f:
-                lines = (l.strip("\n") for l in f)
-                result = self.solve(lines)
-        else:
-            lines = iter("")
-            result = self.solve(lines)
+    def run(self, filename=None, wrong=(), profile=PROFILE):
+        result, timings = self.run_timed(filename, profile)
 
         if result in wrong:
             raise AssertionError(f"wrong result: {result}")
 
-        print(f"{datetime.now() - start} -- {self.name}: {result}")
+        phases = ", ".join(f"{k} {format_ns(v)}" for k, v in timings.items())
+        print(f"{format_ns(sum(timings.values()))} -- {self.name}: {result}  [{phases}]")
+
+    def run_many(self, filenames, workers=None):
+        """Solve many inputs in a process pool.
+
+        Yields (filename, result, timings) in the order of `filenames`.
+        """
+        if workers == 1:
+            # a fresh copy per input, like in the pool, as some puzzles keep state in attributes
+            for filename in filenames:
+                yield filename, *copy.deepcopy(self).run_timed(filename)
+            return
+
+        filenames = list(filenames)
+        with ProcessPoolExecutor(workers) as pool:
+            for filename, (result, timings) in zip(filenames, pool.map(self.run_timed, filenames)):
+                yield filename, result, timings
+
+    def run_timed(self, filename, profile=None):
+        timings = {}
+
+        if self.has_parser():
+            data = self.parse_file(filename, timings)
+            return self.solve_phase(self.solve_parsed, data, timings, profile), timings
+
+        start = time.perf_counter_ns()
+        with self.open_input(filename) as input:
+            timings["read"] = time.perf_counter_ns() - start
+            # parsing happens inside solve and can't be timed separately
+            result = self.solve_phase(self.solve, input, timings, profile)
+        return result, timings
+
+    def solve_phase(self, solve, input, timings, profile=None):
+        with profiling(profile):
+            start = time.perf_counter_ns()
+            result = solve(input)
+            timings["solve"] = time.perf_counter_ns() - start
+        return result
+
+    def has_parser(self):
+        return type(self).parse is not Puzzle.parse
+
+    def parse_file(self, filename, timings=None):
+        if timings is None:
+            timings = {}
+
+        key = None
+        if PARSE_CACHE is not None and filename is not None:
+            start = time.perf_counter_ns()
+            key = PARSE_CACHE.key(type(self).parse, self.parser_version, filename)
+            try:
+                return PARSE_CACHE.load(key)
+            except KeyError:
+                pass
+            finally:
+                timings["cache"] = time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        with self.open_input(filename) as input:
+            timings["read"] = time.perf_counter_ns() - start
+            start = time.perf_counter_ns()
+            data = self.parse(input)
+            timings["parse"] = time.perf_counter_ns() - start
+
+        if key is not None:
+            PARSE_CACHE.store(key, data)
+        return data
+
+    def solve_file(self, filename):
+        if self.has_parser():
+            return self.solve_parsed(self.parse_file(filename))
+        if filename is None:
+            with self.open_input(None) as input:
+                return self.solve(input)
+        if self.input_mode == "buffer":
+            with map_file(filename) as buf:
+                return self.solve(buf)
+        with open(filename, "rt") as f:
+            lines = (l.strip("\n") for l in f)
+            return self.solve(lines)
+
+    @contextmanager
+    def open_input(self, filename):
+        if self.input_mode == "buffer":
+            if filename is None:
+                yield b""
+            else:
+                with map_file(filename) as buf:
+                    yield buf
+        elif filename is None:
+            yield iter([])
+        else:
+            yield iter(self.read_lines(filename))
+
+    def read_lines(self, filename):
+        with open(filename, "rt") as f:
+            return [l.strip("\n") for l in f]
+
+
+@contextmanager
+def profiling(mode):
+    match mode:
+        case None | "":
+            yield
+        case "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                pstats.Stats(profiler).sort_stats("tottime").print_stats(PROFILE_TOP)
+        case "tracemalloc":
+            tracemalloc.start()
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"peak traced memory: {peak / 2**20:.1f} MiB")
+                for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+                    print(stat)
+        case other:
+            raise ValueError(f"unknown profiler: {other}")
+
+
+def format_ns(ns):
+    return f"{ns / 1e6:.3f}ms"